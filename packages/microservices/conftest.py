@@ -0,0 +1,12 @@
+import httpx
+import pytest
+
+from main import app
+
+
+@pytest.fixture
+async def client():
+    # Drive the ASGI app in-process on the test's event loop
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
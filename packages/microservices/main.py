@@ -1,153 +1,342 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request, Response
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 import httpx
+import logging
+import msgspec
+import orjson
 import os
-from typing import List, Dict, Any
-import uvicorn
+import re
+from time import monotonic
+from typing import Callable, Dict, Any, List, Tuple, Type
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+# Coarse wall-clock timestamp shared by the mock/status endpoints,
+# refreshed once per second by _tick() instead of formatted per request
+_now_iso = datetime.now().isoformat()
+
+async def _tick():
+    global _now_iso
+    while True:
+        _now_iso = datetime.now().isoformat()
+        await asyncio.sleep(1.0)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared outbound HTTP client - handlers use request.app.state.http so
+    # connections (and HTTP/2 streams) are pooled instead of re-handshaking
+    app.state.http = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        http2=True,
+        timeout=httpx.Timeout(30.0, connect=5.0)
+    )
+    ticker = asyncio.create_task(_tick())
+    try:
+        yield
+    finally:
+        ticker.cancel()
+        await app.state.http.aclose()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Wix Studio Agency - Microservices",
     description="Python microservices for custom integrations and data processing",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+class InternalErrorMiddleware:
+    """
+    Turn unexpected failures into a generic 500, so handlers need no try/except
+    and internal error details are logged rather than returned to clients
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            if response_started:
+                raise
+            # Handled here rather than by an Exception handler, which Starlette's
+            # ServerErrorMiddleware re-raises (logging it twice) outside CORS/GZip
+            logger.exception("Unhandled error on %s %s", scope["method"], scope["path"])
+            response = ORJSONResponse({"detail": "Internal server error"}, status_code=500)
+            await response(scope, receive, send)
+
+# Innermost middleware, so the generic 500 still passes through GZip and CORS
+app.add_middleware(InternalErrorMiddleware)
+
+# Compress larger payloads only; small status/health replies skip gzip entirely
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# Add CORS middleware only when browser origins are configured; service-to-service
+# traffic needs no CORS handling, so the layer is left out of the stack entirely
+ALLOWED_ORIGINS = [o.strip() for o in os.getenv("CORS_ORIGINS", "").split(",") if o.strip()]
+
+if ALLOWED_ORIGINS:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=ALLOWED_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["GET", "POST"],
+        allow_headers=["content-type", "authorization"],
+    )
 
-# Pydantic models
+# Response models - only used to document the OpenAPI schema
 class HealthResponse(BaseModel):
     status: str
     timestamp: str
     version: str
 
-class WixIntegrationRequest(BaseModel):
-    site_id: str
-    action: str
-    data: Dict[str, Any]
-
 class ProcessingResult(BaseModel):
     success: bool
     message: str
     data: Dict[str, Any] = {}
 
-# Routes
-@app.get("/", response_model=Dict[str, Any])
-async def root():
+# Request models - decoded with msgspec rather than pydantic
+class WixIntegrationRequest(msgspec.Struct):
+    site_id: str
+    action: str
+    data: Dict[str, Any]
+
+class WebhookHeader(msgspec.Struct):
+    # Only the fields the handler reads; msgspec skips the rest of the payload
+    # without building Python objects for it. Typed Any so any JSON value is
+    # echoed back as before instead of becoming a new reason to reject
+    id: Any = "unknown"
+    eventType: Any = "unknown"
+
+_ERROR_PATH_RE = re.compile(r"\.(\w+)|\[(\d+)\]")
+_MISSING_FIELD_RE = re.compile(r"^Object missing required field `(\w+)`$")
+
+def _validation_error(exc: msgspec.DecodeError) -> RequestValidationError:
+    """Report a msgspec error in FastAPI's usual {"detail": [{loc, msg, type}]} shape
+
+    msgspec only exposes the failing location inside its message text, so the
+    loc is parsed from that wording; requirements.txt pins the msgspec range
+    this parsing is tested against.
+    """
+    # msgspec appends the failing location as " - at `$.field[0]`"
+    message, _, path = str(exc).partition(" - at `")
+    loc = ["body"]
+    for field, index in _ERROR_PATH_RE.findall(path):
+        loc.append(field or int(index))
+
+    error_type = "value_error" if isinstance(exc, msgspec.ValidationError) else "json_invalid"
+    # A missing field is reported at its parent object; point loc at the field itself
+    missing = _MISSING_FIELD_RE.match(message)
+    if missing:
+        loc.append(missing.group(1))
+        error_type = "missing"
+    return RequestValidationError([{"type": error_type, "loc": tuple(loc), "msg": message, "input": None}])
+
+def _decode(struct_type: Type[msgspec.Struct]) -> Callable:
+    """Build a dependency that decodes the JSON request body into struct_type"""
+    async def decode_body(request: Request):
+        try:
+            return msgspec.json.decode(await request.body(), type=struct_type)
+        except msgspec.DecodeError as e:  # ValidationError is a subclass
+            raise _validation_error(e)
+
+    return decode_body
+
+def _body_schema(struct_type: Type[msgspec.Struct]) -> Dict[str, Any]:
+    """openapi_extra documenting struct_type as the request body, since FastAPI
+    only sees the raw Request the dependency reads"""
+    _, components = msgspec.json.schema_components([struct_type])
     return {
-        "message": "Wix Studio Agency - Python Microservices",
-        "version": "1.0.0",
-        "status": "healthy",
-        "services": [
-            "Wix Data Processing",
-            "Custom Integrations",
-            "Analytics Processing",
-            "Webhook Handlers"
-        ]
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": components[struct_type.__name__]}}
+        }
     }
 
-@app.get("/health", response_model=HealthResponse)
+# Pre-serialized response bodies
+_ROOT_BODY = orjson.dumps({
+    "message": "Wix Studio Agency - Python Microservices",
+    "version": "1.0.0",
+    "status": "healthy",
+    "services": [
+        "Wix Data Processing",
+        "Custom Integrations",
+        "Analytics Processing",
+        "Webhook Handlers"
+    ]
+})
+
+STATUS_CACHE_TTL = 5.0
+_status_cache: Tuple[float, bytes] = (0.0, b"")
+
+def _build_integration_status() -> bytes:
+    # One timestamp for all three integrations - they all mean "right now"
+    now = _now_iso
+    return orjson.dumps({
+        "integrations": {
+            "wix_studio": {"status": "active", "last_sync": now},
+            "azure_services": {"status": "active", "last_check": now},
+            "analytics": {"status": "active", "last_update": now}
+        }
+    })
+
+def _aggregate_metrics(records: List[Any]) -> Dict[str, Any]:
+    """
+    Compute event metrics over analytics records of the form
+    {"user_id": str | int, "converted": bool}; anything that is not an
+    object is skipped rather than rejected
+    """
+    total_events = 0
+    converted = 0
+    users = set()
+
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        total_events += 1
+
+        user_id = record.get("user_id")
+        # Key by type so "1" and 1 stay distinct; bool is not a user id
+        if isinstance(user_id, (str, int)) and not isinstance(user_id, bool):
+            users.add((type(user_id), user_id))
+
+        if record.get("converted") is True:
+            converted += 1
+
+    return {
+        "total_events": total_events,
+        "unique_users": len(users),
+        "conversion_rate": converted / total_events if total_events else 0.0
+    }
+
+# Routes
+@app.get("/")
+async def root():
+    # A fresh Response wraps the shared bytes; reusing one Response object
+    # would let middleware append headers to it on every request
+    return Response(content=_ROOT_BODY, media_type="application/json")
+
+# Response models are only documented via `responses=`; handlers return
+# ORJSONResponse directly so FastAPI skips validating and re-dumping them
+@app.get("/health", responses={200: {"model": HealthResponse}})
 async def health_check():
-    return HealthResponse(
-        status="healthy",
-        timestamp=datetime.now().isoformat(),
-        version="1.0.0"
-    )
+    return ORJSONResponse({
+        "status": "healthy",
+        "timestamp": datetime.now(),
+        "version": "1.0.0"
+    })
 
-@app.post("/api/wix/process", response_model=ProcessingResult)
-async def process_wix_data(request: WixIntegrationRequest):
+@app.post(
+    "/api/wix/process",
+    responses={200: {"model": ProcessingResult}},
+    openapi_extra=_body_schema(WixIntegrationRequest)
+)
+async def process_wix_data(request: WixIntegrationRequest = Depends(_decode(WixIntegrationRequest))):
     """
     Process Wix Studio data and perform custom integrations
     """
-    try:
-        # Mock processing logic - replace with actual integration
-        processed_data = {
-            "site_id": request.site_id,
-            "action": request.action,
-            "processed_at": datetime.now().isoformat(),
-            "result": f"Processed {request.action} for site {request.site_id}"
-        }
+    # Mock processing logic - replace with actual integration
+    processed_data = {
+        "site_id": request.site_id,
+        "action": request.action,
+        "processed_at": _now_iso,
+        "result": f"Processed {request.action} for site {request.site_id}"
+    }
 
-        return ProcessingResult(
-            success=True,
-            message="Data processed successfully",
-            data=processed_data
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+    return ORJSONResponse({
+        "success": True,
+        "message": "Data processed successfully",
+        "data": processed_data
+    })
 
 @app.post("/api/analytics/process")
 async def process_analytics(data: Dict[str, Any]):
     """
     Process analytics data from various sources
     """
-    try:
-        # Mock analytics processing
-        analytics_result = {
-            "processed_records": len(data.get("records", [])),
-            "timestamp": datetime.now().isoformat(),
-            "metrics": {
-                "total_events": 0,
-                "unique_users": 0,
-                "conversion_rate": 0.0
-            }
-        }
+    records = data.get("records")
+    # A missing or non-list "records" is treated as no records at all
+    if not isinstance(records, list):
+        records = []
+    analytics_result = {
+        "processed_records": len(records),
+        "timestamp": _now_iso,
+        "metrics": _aggregate_metrics(records)
+    }
 
-        return {
-            "success": True,
-            "message": "Analytics processed successfully",
-            "data": analytics_result
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Analytics processing failed: {str(e)}")
+    return ORJSONResponse({
+        "success": True,
+        "message": "Analytics processed successfully",
+        "data": analytics_result
+    })
 
-@app.post("/api/webhook/wix")
-async def wix_webhook_handler(payload: Dict[str, Any]):
+@app.post("/api/webhook/wix", openapi_extra=_body_schema(WebhookHeader))
+async def wix_webhook_handler(payload: WebhookHeader = Depends(_decode(WebhookHeader))):
     """
     Handle incoming webhooks from Wix Studio
     """
-    try:
-        # Process webhook payload
-        webhook_result = {
-            "webhook_id": payload.get("id", "unknown"),
-            "event_type": payload.get("eventType", "unknown"),
-            "processed_at": datetime.now().isoformat(),
-            "status": "processed"
-        }
+    # Process webhook payload
+    webhook_result = {
+        "webhook_id": payload.id,
+        "event_type": payload.eventType,
+        "processed_at": _now_iso,
+        "status": "processed"
+    }
 
-        return {
-            "success": True,
-            "message": "Webhook processed successfully",
-            "data": webhook_result
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Webhook processing failed: {str(e)}")
+    return ORJSONResponse({
+        "success": True,
+        "message": "Webhook processed successfully",
+        "data": webhook_result
+    })
 
 @app.get("/api/integrations/status")
 async def get_integration_status():
     """
     Get status of various integrations
     """
-    return {
-        "integrations": {
-            "wix_studio": {"status": "active", "last_sync": datetime.now().isoformat()},
-            "azure_services": {"status": "active", "last_check": datetime.now().isoformat()},
-            "analytics": {"status": "active", "last_update": datetime.now().isoformat()}
-        }
-    }
+    global _status_cache
+    expiry, body = _status_cache
+    now = monotonic()
+    if now >= expiry:
+        body = _build_integration_status()
+        _status_cache = (now + STATUS_CACHE_TTL, body)
+    return Response(content=body, media_type="application/json")
 
 if __name__ == "__main__":
+    # Imported here so ASGI servers loading main:app don't pay for it
+    import uvicorn
+
+    # Hot reload is development-only (and runs a single worker); otherwise run
+    # WEB_CONCURRENCY workers, defaulting to one like the uvicorn CLI since
+    # os.cpu_count() ignores container CPU quotas. The loop and HTTP parser
+    # stay on uvicorn's "auto" default, which picks uvloop/httptools when
+    # uvicorn[standard] installed them and falls back cleanly (e.g. on Windows)
+    reload = os.getenv("PYTHON_ENV") == "development"
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=int(os.getenv("PORT", 8000)),
-        reload=True
+        workers=1 if reload else int(os.getenv("WEB_CONCURRENCY", 1)),
+        reload=reload
     )
@@ -0,0 +1,32 @@
+import asyncio
+
+import httpx
+
+import main
+
+
+async def test_health_endpoint(client):
+    response = await client.get("/health")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "healthy"
+    assert body["version"] == "1.0.0"
+    assert body["timestamp"]
+
+
+async def test_root_endpoint(client):
+    response = await client.get("/")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["status"] == "healthy"
+
+
+async def test_lifespan_shares_http_client_and_refreshes_timestamp(monkeypatch):
+    monkeypatch.setattr(main, "_now_iso", "stale")
+    async with main.lifespan(main.app):
+        client = main.app.state.http
+        assert isinstance(client, httpx.AsyncClient)
+        # Let the ticker task run its first refresh
+        await asyncio.sleep(0)
+        assert main._now_iso != "stale"
+    assert client.is_closed
@@ -0,0 +1,180 @@
+import main
+from main import _aggregate_metrics
+
+
+def test_aggregate_metrics_counts_real_user_ids():
+    records = [
+        {"user_id": -1, "converted": True},
+        {"user_id": -2, "converted": False},
+        {"user_id": 1},
+        {"user_id": "1", "converted": True},
+        {"user_id": "1"},
+    ]
+    metrics = _aggregate_metrics(records)
+    assert metrics["total_events"] == 5
+    assert metrics["unique_users"] == 4
+    assert metrics["conversion_rate"] == 0.4
+
+
+def test_aggregate_metrics_ignores_missing_ids_and_non_boolean_flags():
+    records = [
+        {"converted": "false"},
+        {"user_id": None, "converted": 1},
+        {"user_id": True, "converted": "true"},
+        {"user_id": [1]},
+    ]
+    metrics = _aggregate_metrics(records)
+    assert metrics == {"total_events": 4, "unique_users": 0, "conversion_rate": 0.0}
+
+
+def test_aggregate_metrics_empty():
+    assert _aggregate_metrics([]) == {"total_events": 0, "unique_users": 0, "conversion_rate": 0.0}
+
+
+async def test_analytics_endpoint_computes_metrics(client):
+    response = await client.post("/api/analytics/process", json={
+        "records": [
+            {"user_id": "a", "converted": True},
+            {"user_id": "b", "converted": False},
+        ]
+    })
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["processed_records"] == 2
+    assert data["metrics"] == {"total_events": 2, "unique_users": 2, "conversion_rate": 0.5}
+
+
+async def test_analytics_endpoint_skips_malformed_records(client):
+    response = await client.post("/api/analytics/process", json={"records": [1, 2, 3]})
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["processed_records"] == 3
+    assert data["metrics"]["total_events"] == 0
+
+
+async def test_analytics_endpoint_treats_non_list_records_as_empty(client):
+    for payload in ({"records": "abc"}, {"records": None}, {"records": 5}, {}):
+        response = await client.post("/api/analytics/process", json=payload)
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert data["processed_records"] == 0
+        assert data["metrics"] == {"total_events": 0, "unique_users": 0, "conversion_rate": 0.0}
+
+
+async def test_wix_process_success(client):
+    response = await client.post("/api/wix/process", json={
+        "site_id": "site-1",
+        "action": "sync",
+        "data": {"key": "value"}
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["success"] is True
+    assert body["data"]["site_id"] == "site-1"
+    assert body["data"]["result"] == "Processed sync for site site-1"
+
+
+async def test_wix_process_rejects_invalid_body(client):
+    response = await client.post("/api/wix/process", json={"site_id": 1, "action": "sync", "data": {}})
+    assert response.status_code == 422
+    [error] = response.json()["detail"]
+    assert error["loc"] == ["body", "site_id"]
+    assert error["type"] == "value_error"
+    assert "str" in error["msg"]
+
+
+async def test_wix_process_rejects_missing_field(client):
+    response = await client.post("/api/wix/process", json={"site_id": "site-1", "data": {}})
+    assert response.status_code == 422
+    [error] = response.json()["detail"]
+    assert error["loc"] == ["body", "action"]
+    assert error["type"] == "missing"
+    assert "action" in error["msg"]
+
+
+async def test_wix_process_rejects_malformed_json(client):
+    response = await client.post(
+        "/api/wix/process", content=b"{not json", headers={"content-type": "application/json"}
+    )
+    assert response.status_code == 422
+    [error] = response.json()["detail"]
+    assert error["type"] == "json_invalid"
+
+
+async def test_openapi_documents_msgspec_request_bodies(client):
+    paths = (await client.get("/openapi.json")).json()["paths"]
+    schema = paths["/api/wix/process"]["post"]["requestBody"]["content"]["application/json"]["schema"]
+    assert set(schema["required"]) == {"site_id", "action", "data"}
+    assert "requestBody" in paths["/api/webhook/wix"]["post"]
+
+
+async def test_webhook_echoes_id_and_event_type(client):
+    response = await client.post("/api/webhook/wix", json={
+        "id": "evt-1",
+        "eventType": "site.published",
+        "payload": {"nested": [1, 2, 3]}
+    })
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["webhook_id"] == "evt-1"
+    assert data["event_type"] == "site.published"
+    assert data["status"] == "processed"
+
+
+async def test_webhook_defaults_missing_fields(client):
+    response = await client.post("/api/webhook/wix", json={})
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["webhook_id"] == "unknown"
+    assert data["event_type"] == "unknown"
+
+
+async def test_webhook_accepts_non_string_ids(client):
+    for webhook_id in (123, None):
+        response = await client.post("/api/webhook/wix", json={"id": webhook_id})
+        assert response.status_code == 200
+        assert response.json()["data"]["webhook_id"] == webhook_id
+
+
+async def test_webhook_rejects_malformed_json(client):
+    response = await client.post(
+        "/api/webhook/wix", content=b"{\"id\": ", headers={"content-type": "application/json"}
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "json_invalid"
+
+
+async def test_unhandled_error_returns_generic_500(client, monkeypatch, caplog):
+    def fail(records):
+        raise RuntimeError("internal detail")
+
+    monkeypatch.setattr(main, "_aggregate_metrics", fail)
+    response = await client.post("/api/analytics/process", json={"records": []})
+    assert response.status_code == 500
+    assert response.json() == {"detail": "Internal server error"}
+    assert "internal detail" not in response.text
+    assert [r.message for r in caplog.records] == ["Unhandled error on POST /api/analytics/process"]
+
+
+async def test_integration_status_is_cached_for_ttl(client, monkeypatch):
+    clock = [1000.0]
+    # Patch only main's own reference, not the process-wide clock asyncio uses
+    monkeypatch.setattr(main, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(main, "_status_cache", (0.0, b""))
+
+    monkeypatch.setattr(main, "_now_iso", "2026-01-01T00:00:00")
+    first = await client.get("/api/integrations/status")
+    assert first.status_code == 200
+    assert first.json()["integrations"]["wix_studio"]["last_sync"] == "2026-01-01T00:00:00"
+
+    # Within the TTL the cached body is served even though the clock moved on
+    monkeypatch.setattr(main, "_now_iso", "2026-01-01T00:00:01")
+    clock[0] += main.STATUS_CACHE_TTL - 0.1
+    assert (await client.get("/api/integrations/status")).content == first.content
+
+    # Once it expires the body is rebuilt with one timestamp for every integration
+    clock[0] += 0.2
+    integrations = (await client.get("/api/integrations/status")).json()["integrations"]
+    assert integrations["wix_studio"]["last_sync"] == "2026-01-01T00:00:01"
+    assert integrations["azure_services"]["last_check"] == "2026-01-01T00:00:01"
+    assert integrations["analytics"]["last_update"] == "2026-01-01T00:00:01"
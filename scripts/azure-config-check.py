@@ -5,75 +5,203 @@ Validates Azure Bicep templates against security best practices
 """
 
 import json
+import mmap
+import os
 import sys
 import re
 from pathlib import Path
-from typing import List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Set, Tuple, Union
+
+try:
+    import hyperscan
+except ImportError:  # optional: fall back to one compiled regex per rule
+    hyperscan = None
+
+# Security best practices rules
+SECURITY_RULES = {
+    'key_vault_access_policies': {
+        'pattern': rb'accessPolicies.*permissions.*secrets.*\[.*get.*list.*\]',
+        'message': 'Key Vault should use least privilege access policies',
+        'severity': 'warning'
+    },
+    'storage_account_secure_transfer': {
+        'pattern': rb'supportsHttpsTrafficOnly.*true',
+        'message': 'Storage accounts should require secure transfer (HTTPS)',
+        'severity': 'error',
+        'required': True
+    },
+    'app_service_https_only': {
+        'pattern': rb'httpsOnly.*true',
+        'message': 'App Services should enforce HTTPS only',
+        'severity': 'error',
+        'required': True
+    },
+    'managed_identity': {
+        'pattern': rb'identity.*type.*SystemAssigned|UserAssigned',
+        'message': 'Resources should use managed identity instead of service principals',
+        'severity': 'warning'
+    },
+    'network_security_groups': {
+        'pattern': rb'securityRules.*access.*Allow.*\*.*\*',
+        'message': 'NSG rules should not allow unrestricted access (*:*)',
+        'severity': 'error',
+        'invert': True
+    },
+    'sql_server_firewall': {
+        'pattern': rb'firewallRules.*startIpAddress.*0\.0\.0\.0.*endIpAddress.*255\.255\.255\.255',
+        'message': 'SQL Server should not allow unrestricted firewall access (0.0.0.0-255.255.255.255)',
+        'severity': 'error',
+        'invert': True
+    }
+}
+
+# Security patterns compiled once at import, in SECURITY_RULES order; the
+# ids scanned together in a single pass are indexes into this tuple
+SECURITY_PATTERNS = tuple(
+    re.compile(rule_config['pattern'], re.IGNORECASE | re.DOTALL)
+    for rule_config in SECURITY_RULES.values()
+)
+
+# Hardcoded sensitive value patterns, keyed by the lowercase keyword each
+# pattern starts with so the keyword can be located before running the regex
+HARDCODED_PATTERNS = [
+    (pattern.split(b'.', 1)[0].lower(), re.compile(pattern, re.IGNORECASE), message)
+    for pattern, message in [
+        (rb'password.*[:=].*[\'"][^\'"]{8,}[\'"]', 'Possible hardcoded password'),
+        (rb'connectionString.*[:=].*[\'"][^\'"]+[\'"]', 'Possible hardcoded connection string'),
+        (rb'apiKey.*[:=].*[\'"][^\'"]+[\'"]', 'Possible hardcoded API key'),
+        (rb'secret.*[:=].*[\'"][^\'"]+[\'"]', 'Possible hardcoded secret'),
+        (rb'token.*[:=].*[\'"][^\'"]+[\'"]', 'Possible hardcoded token')
+    ]
+]
+
+# One case-insensitive pass over the content finds every keyword occurrence
+_HARDCODED_KEYWORD_RE = re.compile(
+    b'|'.join(re.escape(keyword) for keyword, _, _ in HARDCODED_PATTERNS), re.IGNORECASE
+)
+_HARDCODED_BY_KEYWORD = {keyword: pattern for keyword, pattern, _ in HARDCODED_PATTERNS}
+
+# Naming convention rules
+NAMING_RULES = {
+    'resource_group': re.compile(r'^rg-[a-z0-9-]+$'),
+    'storage_account': re.compile(r'^st[a-z0-9]{3,22}$'),
+    'key_vault': re.compile(r'^kv-[a-z0-9-]+$'),
+    'app_service': re.compile(r'^app-[a-z0-9-]+$'),
+    'app_service_plan': re.compile(r'^asp-[a-z0-9-]+$'),
+    'sql_server': re.compile(r'^sql-[a-z0-9-]+$'),
+    'cosmos_db': re.compile(r'^cosmos-[a-z0-9-]+$')
+}
+
+# Map resource types to naming rules
+TYPE_MAPPING = {
+    'Microsoft.Resources/resourceGroups': 'resource_group',
+    'Microsoft.Storage/storageAccounts': 'storage_account',
+    'Microsoft.KeyVault/vaults': 'key_vault',
+    'Microsoft.Web/sites': 'app_service',
+    'Microsoft.Web/serverfarms': 'app_service_plan',
+    'Microsoft.Sql/servers': 'sql_server',
+    'Microsoft.DocumentDB/databaseAccounts': 'cosmos_db'
+}
+
+_RESOURCE_RE = re.compile(rb"resource\s+(\w+)\s+'([^']+)'\s+=\s+\{")
+# Braces and the opening quote of a `name:` property, walked in file order
+_BLOCK_TOKEN_RE = re.compile(rb"[{}]|\bname:\s*'")
+
+# Hyperscan databases are not picklable, so each worker process builds its own
+_hs_db = None
+
+def _build_hyperscan_db():
+    """Compile all scan rules into one Hyperscan database"""
+    db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    flags = []
+    for regex in SECURITY_PATTERNS:
+        rule_flags = hyperscan.HS_FLAG_SINGLEMATCH
+        if regex.flags & re.IGNORECASE:
+            rule_flags |= hyperscan.HS_FLAG_CASELESS
+        if regex.flags & re.DOTALL:
+            rule_flags |= hyperscan.HS_FLAG_DOTALL
+        flags.append(rule_flags)
+
+    db.compile(
+        expressions=[regex.pattern for regex in SECURITY_PATTERNS],
+        ids=list(range(len(SECURITY_PATTERNS))),
+        elements=len(SECURITY_PATTERNS),
+        flags=flags
+    )
+    return db
+
+def _scan(content: Union[bytes, mmap.mmap]) -> Set[int]:
+    """Return the ids of all scan rules that match the content"""
+    global _hs_db
+    if hyperscan is None:
+        # A fused alternation would only report the leftmost match, and the
+        # greedy DOTALL rules span the whole file, so search rule by rule
+        return {rule_id for rule_id, regex in enumerate(SECURITY_PATTERNS) if regex.search(content)}
+
+    if _hs_db is None:
+        _hs_db = _build_hyperscan_db()
+
+    matched = set()
+
+    def on_match(rule_id, start, end, flags, context):
+        matched.add(rule_id)
+
+    # Hyperscan reads the mmap through the buffer protocol, so nothing is copied
+    _hs_db.scan(content, match_event_handler=on_match)
+    return matched
+
+def _resource_name(content: Union[bytes, mmap.mmap], start: int) -> Optional[bytes]:
+    """
+    Return the literal `name:` of the resource block opened just before start,
+    ignoring names of nested objects such as `sku: { name: ... }`. Interpolated
+    names ('${...}') can't be judged statically, so they return None.
+    """
+    depth = 1
+    for token in _BLOCK_TOKEN_RE.finditer(content, start):
+        if token.group() == b'{':
+            depth += 1
+        elif token.group() == b'}':
+            depth -= 1
+            if depth == 0:
+                return None
+        elif depth == 1:
+            # Only the opening quote is consumed, so braces inside the value
+            # are still counted and the depth stays balanced
+            value_end = content.find(b"'", token.end())
+            value = content[token.end():value_end if value_end != -1 else len(content)]
+            return None if b'${' in value else value
+    return None
+
+def _check_one(file_path: str) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """Check one file in a fresh checker and return its (errors, warnings)"""
+    checker = AzureConfigChecker()
+    checker.check_file(file_path)
+    return checker.errors, checker.warnings
 
 class AzureConfigChecker:
     def __init__(self):
-        self.errors = []
-        self.warnings = []
-
-        # Security best practices rules
-        self.security_rules = {
-            'key_vault_access_policies': {
-                'pattern': r'accessPolicies.*permissions.*secrets.*\[.*get.*list.*\]',
-                'message': 'Key Vault should use least privilege access policies',
-                'severity': 'warning'
-            },
-            'storage_account_secure_transfer': {
-                'pattern': r'supportsHttpsTrafficOnly.*true',
-                'message': 'Storage accounts should require secure transfer (HTTPS)',
-                'severity': 'error',
-                'required': True
-            },
-            'app_service_https_only': {
-                'pattern': r'httpsOnly.*true',
-                'message': 'App Services should enforce HTTPS only',
-                'severity': 'error',
-                'required': True
-            },
-            'managed_identity': {
-                'pattern': r'identity.*type.*SystemAssigned|UserAssigned',
-                'message': 'Resources should use managed identity instead of service principals',
-                'severity': 'warning'
-            },
-            'network_security_groups': {
-                'pattern': r'securityRules.*access.*Allow.*\*.*\*',
-                'message': 'NSG rules should not allow unrestricted access (*:*)',
-                'severity': 'error',
-                'invert': True
-            },
-            'sql_server_firewall': {
-                'pattern': r'firewallRules.*startIpAddress.*0\.0\.0\.0.*endIpAddress.*255\.255\.255\.255',
-                'message': 'SQL Server should not allow unrestricted firewall access (0.0.0.0-255.255.255.255)',
-                'severity': 'error',
-                'invert': True
-            }
-        }
-
-        # Naming convention rules
-        self.naming_rules = {
-            'resource_group': r'^rg-[a-z0-9-]+$',
-            'storage_account': r'^st[a-z0-9]{3,22}$',
-            'key_vault': r'^kv-[a-z0-9-]+$',
-            'app_service': r'^app-[a-z0-9-]+$',
-            'app_service_plan': r'^asp-[a-z0-9-]+$',
-            'sql_server': r'^sql-[a-z0-9-]+$',
-            'cosmos_db': r'^cosmos-[a-z0-9-]+$'
-        }
+        # (file_path, message) pairs, only formatted when printed
+        self.errors: List[Tuple[str, str]] = []
+        self.warnings: List[Tuple[str, str]] = []
 
     def check_file(self, file_path: str) -> bool:
         """Check a single Bicep file for security and best practices"""
+        content = None
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            # Map the file read-only and match bytes patterns against it
+            # directly, so the template is never copied or decoded
+            with open(file_path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    content = b''  # mmap cannot map an empty file
+                else:
+                    content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
-            print(f"Checking {file_path}...")
+            # Find every matching security rule in one scan
+            matched = _scan(content)
 
             # Check security rules
-            self._check_security_rules(content, file_path)
+            self._check_security_rules(matched, file_path)
 
             # Check naming conventions
             self._check_naming_conventions(content, file_path)
@@ -87,112 +215,108 @@ class AzureConfigChecker:
             return len(self.errors) == 0
 
         except Exception as e:
-            self.errors.append(f"Error reading {file_path}: {str(e)}")
+            self.errors.append((file_path, f"Error reading: {str(e)}"))
             return False
 
-    def _check_security_rules(self, content: str, file_path: str):
+        finally:
+            if isinstance(content, mmap.mmap):
+                content.close()
+
+    def _check_security_rules(self, matched: Set[int], file_path: str):
         """Check security-related rules"""
-        for rule_name, rule_config in self.security_rules.items():
-            pattern = rule_config['pattern']
+        for rule_id, rule_config in enumerate(SECURITY_RULES.values()):
             message = rule_config['message']
             severity = rule_config['severity']
             invert = rule_config.get('invert', False)
             required = rule_config.get('required', False)
 
-            matches = re.search(pattern, content, re.IGNORECASE | re.DOTALL)
+            matches = rule_id in matched
 
             if invert:
                 # Rule should NOT match (e.g., no unrestricted access)
                 if matches:
                     if severity == 'error':
-                        self.errors.append(f"{file_path}: {message}")
+                        self.errors.append((file_path, message))
                     else:
-                        self.warnings.append(f"{file_path}: {message}")
+                        self.warnings.append((file_path, message))
             else:
                 # Rule should match (e.g., HTTPS required)
                 if not matches and required:
                     if severity == 'error':
-                        self.errors.append(f"{file_path}: {message}")
+                        self.errors.append((file_path, message))
                     else:
-                        self.warnings.append(f"{file_path}: {message}")
+                        self.warnings.append((file_path, message))
 
-    def _check_naming_conventions(self, content: str, file_path: str):
+    def _check_naming_conventions(self, content: Union[bytes, mmap.mmap], file_path: str):
         """Check Azure resource naming conventions"""
         # Extract resource declarations
-        resource_pattern = r"resource\s+(\w+)\s+'([^']+)'\s+=\s+{"
-        resources = re.findall(resource_pattern, content)
-
-        for resource_name, resource_type in resources:
-            # Map resource types to naming rules
-            type_mapping = {
-                'Microsoft.Resources/resourceGroups': 'resource_group',
-                'Microsoft.Storage/storageAccounts': 'storage_account',
-                'Microsoft.KeyVault/vaults': 'key_vault',
-                'Microsoft.Web/sites': 'app_service',
-                'Microsoft.Web/serverfarms': 'app_service_plan',
-                'Microsoft.Sql/servers': 'sql_server',
-                'Microsoft.DocumentDB/databaseAccounts': 'cosmos_db'
-            }
-
-            naming_type = type_mapping.get(resource_type)
-            if naming_type and naming_type in self.naming_rules:
-                pattern = self.naming_rules[naming_type]
-
-                # Find the name property
-                name_pattern = f"name:\\s*'([^']+)'"
-                name_match = re.search(name_pattern, content)
-
-                if name_match:
-                    resource_actual_name = name_match.group(1)
-                    if not re.match(pattern, resource_actual_name):
-                        self.warnings.append(
-                            f"{file_path}: Resource '{resource_name}' of type '{resource_type}' "
-                            f"should follow naming convention: {pattern}"
-                        )
-
-    def _check_hardcoded_values(self, content: str, file_path: str):
+        for resource in _RESOURCE_RE.finditer(content):
+            resource_name = resource.group(1).decode('utf-8')
+            # Drop the '@apiVersion' suffix every Bicep resource type carries
+            resource_type = resource.group(2).decode('utf-8').split('@', 1)[0]
+
+            naming_type = TYPE_MAPPING.get(resource_type)
+            if naming_type and naming_type in NAMING_RULES:
+                pattern = NAMING_RULES[naming_type]
+
+                # Find the name property of this resource's own block
+                resource_actual_name = _resource_name(content, resource.end())
+
+                if resource_actual_name is not None:
+                    resource_actual_name = resource_actual_name.decode('utf-8')
+                    if not pattern.match(resource_actual_name):
+                        self.warnings.append((
+                            file_path,
+                            f"Resource '{resource_name}' of type '{resource_type}' "
+                            f"should follow naming convention: {pattern.pattern}"
+                        ))
+
+    def _check_hardcoded_values(self, content: Union[bytes, mmap.mmap], file_path: str):
         """Check for hardcoded sensitive values"""
-        hardcoded_patterns = [
-            (r'password.*[:=].*[\'"][^\'"]{8,}[\'"]', 'Possible hardcoded password'),
-            (r'connectionString.*[:=].*[\'"][^\'"]+[\'"]', 'Possible hardcoded connection string'),
-            (r'apiKey.*[:=].*[\'"][^\'"]+[\'"]', 'Possible hardcoded API key'),
-            (r'secret.*[:=].*[\'"][^\'"]+[\'"]', 'Possible hardcoded secret'),
-            (r'token.*[:=].*[\'"][^\'"]+[\'"]', 'Possible hardcoded token')
-        ]
-
-        for pattern, message in hardcoded_patterns:
-            if re.search(pattern, content, re.IGNORECASE):
-                self.errors.append(f"{file_path}: {message}")
-
-    def _check_resource_dependencies(self, content: str, file_path: str):
+        # Locate all keywords in a single pass over the mapped file and only try
+        # the matching regex, anchored, at each hit instead of scanning the file
+        found = set()
+        hit = _HARDCODED_KEYWORD_RE.search(content)
+        while hit and len(found) < len(HARDCODED_PATTERNS):
+            keyword = hit.group().lower()
+            if keyword not in found and _HARDCODED_BY_KEYWORD[keyword].match(content, hit.start()):
+                found.add(keyword)
+            # Resume one byte on so overlapping keywords ("secretoken") are seen
+            hit = _HARDCODED_KEYWORD_RE.search(content, hit.start() + 1)
+
+        for keyword, _, message in HARDCODED_PATTERNS:
+            if keyword in found:
+                self.errors.append((file_path, message))
+
+    def _check_resource_dependencies(self, content: Union[bytes, mmap.mmap], file_path: str):
         """Check for proper resource dependencies"""
         # Check if resources that depend on Key Vault are properly configured
-        if 'Microsoft.KeyVault/vaults' in content:
+        if content.find(b'Microsoft.KeyVault/vaults') != -1:
             # Ensure resources depending on Key Vault have proper access policies
-            if 'Microsoft.Web/sites' in content or 'Microsoft.ContainerInstance/containerGroups' in content:
-                if 'accessPolicies' not in content:
+            if content.find(b'Microsoft.Web/sites') != -1 or content.find(b'Microsoft.ContainerInstance/containerGroups') != -1:
+                if content.find(b'accessPolicies') == -1:
                     self.warnings.append(
-                        f"{file_path}: Resources using Key Vault should have proper access policies defined"
+                        (file_path, "Resources using Key Vault should have proper access policies defined")
                     )
 
         # Check for proper network configuration
-        if 'Microsoft.Web/sites' in content:
-            if 'vnetRouteAllEnabled' not in content:
+        if content.find(b'Microsoft.Web/sites') != -1:
+            if content.find(b'vnetRouteAllEnabled') == -1:
                 self.warnings.append(
-                    f"{file_path}: App Services should consider VNet integration for enhanced security"
+                    (file_path, "App Services should consider VNet integration for enhanced security")
                 )
 
     def print_results(self):
         """Print check results"""
         if self.errors:
             print("\n❌ ERRORS:")
-            for error in self.errors:
-                print(f"  {error}")
+            for file_path, message in self.errors:
+                print(f"  {file_path}: {message}")
 
         if self.warnings:
             print("\n⚠️  WARNINGS:")
-            for warning in self.warnings:
-                print(f"  {warning}")
+            for file_path, message in self.warnings:
+                print(f"  {file_path}: {message}")
 
         if not self.errors and not self.warnings:
             print("\n✅ All checks passed!")
@@ -205,14 +329,22 @@ def main():
         sys.exit(1)
 
     checker = AzureConfigChecker()
-    all_passed = True
-
-    for file_path in sys.argv[1:]:
-        if not file_path.endswith('.bicep'):
-            continue
-
-        if not checker.check_file(file_path):
-            all_passed = False
+    bicep_paths = [file_path for file_path in sys.argv[1:] if file_path.endswith('.bicep')]
+
+    if len(bicep_paths) > 1:
+        # Files are independent, so check them in parallel across processes; one
+        # file per task spreads a handful of files over all workers, and the pool
+        # never starts more workers than there are files
+        max_workers = min(len(bicep_paths), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_check_one, bicep_paths, chunksize=1))
+    else:
+        results = [_check_one(file_path) for file_path in bicep_paths]
+
+    for file_path, (errors, warnings) in zip(bicep_paths, results):
+        print(f"Checking {file_path}...")
+        checker.errors.extend(errors)
+        checker.warnings.extend(warnings)
 
     success = checker.print_results()
 
@@ -0,0 +1,72 @@
+import importlib.util
+from pathlib import Path
+
+# The checker is a script with a dashed file name, so load it by path
+_spec = importlib.util.spec_from_file_location(
+    "azure_config_check", Path(__file__).with_name("azure-config-check.py")
+)
+azure_config_check = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(azure_config_check)
+
+
+def _naming_warnings(tmp_path, template_text):
+    template = tmp_path / "main.bicep"
+    template.write_text(template_text)
+
+    checker = azure_config_check.AzureConfigChecker()
+    checker.check_file(str(template))
+    return [message for _, message in checker.warnings if 'naming convention' in message]
+
+
+def test_naming_check_matches_versioned_types_and_scopes_names(tmp_path):
+    # Only badPlan's own name fails; goodPlan is not judged by another block's name
+    assert _naming_warnings(tmp_path, """
+resource goodPlan 'Microsoft.Web/serverfarms@2023-01-01' = {
+  name: 'asp-good'
+  sku: {
+    name: 'B1'
+  }
+}
+
+resource badPlan 'Microsoft.Web/serverfarms@2023-01-01' = {
+  name: 'BadPlan'
+}
+""") == [
+        "Resource 'badPlan' of type 'Microsoft.Web/serverfarms' "
+        "should follow naming convention: ^asp-[a-z0-9-]+$"
+    ]
+
+
+def test_naming_check_uses_top_level_name_after_nested_sku(tmp_path):
+    assert _naming_warnings(tmp_path, """
+resource storage 'Microsoft.Storage/storageAccounts@2023-01-01' = {
+  sku: {
+    name: 'Standard_LRS'
+  }
+  name: 'stgood123'
+}
+""") == []
+
+
+def test_naming_check_skips_interpolated_names(tmp_path):
+    # The quotes inside the replace() call must not end the value or unbalance
+    # the brace depth, so badPlan after it is still checked
+    assert _naming_warnings(tmp_path, """
+resource plan 'Microsoft.Web/serverfarms@2023-01-01' = {
+  name: 'asp-${resourceName}'
+}
+
+resource keyVault 'Microsoft.KeyVault/vaults@2023-07-01' = {
+  name: '${replace(resourceName, '-', '')}kv'
+  properties: {
+    tenantId: subscription().tenantId
+  }
+}
+
+resource badPlan 'Microsoft.Web/serverfarms@2023-01-01' = {
+  name: 'BadPlan'
+}
+""") == [
+        "Resource 'badPlan' of type 'Microsoft.Web/serverfarms' "
+        "should follow naming convention: ^asp-[a-z0-9-]+$"
+    ]